@@ -3,16 +3,16 @@ import datetime
 import json
 import os
 from PIL import Image
-import pytesseract
-import io
 import base64
 import requests
+from ocr_helpers import extract_text_from_image, image_to_base64
+import chat_archive
 
 # ----------------------------
 # Config
 # ----------------------------
 st.set_page_config(page_title="Chat with AI + OCR", page_icon="🤖", layout="wide")
-DATA_FILE = "chats.json"
+DATA_FILE = os.getenv("CHAT_DATA_FILE", "chats.json")
 
 # DO NOT set tesseract path for Linux (Streamlit Cloud)
 # Streamlit Cloud will find it automatically via packages.txt
@@ -21,6 +21,8 @@ DATA_FILE = "chats.json"
 # Groq API Setup (Free alternative to Ollama)
 # ----------------------------
 GROQ_API_KEY = st.secrets.get("GROQ_API_KEY", None) if hasattr(st, 'secrets') else os.getenv("GROQ_API_KEY")
+# Point at a local OpenAI-compatible server (e.g. mock_groq_server.py) for load testing
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1").rstrip("/")
 
 def call_groq_api(messages, model="llama-3.1-8b-instant"):
     """Call Groq API for chat completion"""
@@ -41,7 +43,7 @@ def call_groq_api(messages, model="llama-3.1-8b-instant"):
         }
         
         response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
+            f"{GROQ_BASE_URL}/chat/completions",
             headers=headers,
             json=data,
             timeout=30
@@ -54,29 +56,6 @@ def call_groq_api(messages, model="llama-3.1-8b-instant"):
     except Exception as e:
         return f"⚠️ Error calling API: {str(e)}"
 
-# ----------------------------
-# OCR Helper Functions
-# ----------------------------
-def extract_text_from_image(image, lang='eng'):
-    """Extract text from PIL Image using Tesseract OCR"""
-    try:
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
-        return text.strip()
-    except pytesseract.TesseractNotFoundError:
-        return "ERROR: Tesseract is not installed. Please check your packages.txt file."
-    except Exception as e:
-        return f"Error extracting text: {str(e)}"
-
-def image_to_base64(image):
-    """Convert PIL Image to base64 for storage"""
-    buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
-
 # ----------------------------
 # Persistence helpers
 # ----------------------------
@@ -93,17 +72,30 @@ def load_chats():
     return {}
 
 def save_chats(chats):
+    """Write chats to DATA_FILE; returns False (after showing the error) on failure"""
     try:
         with open(DATA_FILE, "w", encoding="utf-8") as f:
             json.dump(chats, f, ensure_ascii=False, indent=2, default=str)
+        return True
     except IOError as e:
         st.error(f"Error saving chats: {str(e)}")
+        return False
+
+def archive_old_chats(chats):
+    """Move idle chats to the compressed archive and apply retention"""
+    try:
+        if chat_archive.archive_idle_chats(chats):
+            save_chats(chats)
+        chat_archive.apply_retention()
+    except (OSError, EOFError, ValueError) as e:
+        st.error(f"Error archiving chats: {str(e)}")
 
 # ----------------------------
 # Init session state
 # ----------------------------
 if "chats" not in st.session_state:
     st.session_state.chats = load_chats()
+    archive_old_chats(st.session_state.chats)
 if "active_chat" not in st.session_state:
     st.session_state.active_chat = None
 if "ocr_language" not in st.session_state:
@@ -451,6 +443,47 @@ with st.sidebar:
                             st.session_state.active_chat = None
                         st.rerun()
 
+    # Archived chats are listed from the index; opening one rehydrates it.
+    # Chats this session still holds (e.g. opened before they were archived)
+    # are hidden so they don't show up twice.
+    try:
+        archived = chat_archive.list_archived(exclude=st.session_state.chats)
+    except (OSError, ValueError) as e:
+        archived = {}
+        st.error(f"Error reading chat archive: {str(e)}")
+    if archived:
+        with st.expander(f"🗄 Archived ({len(archived)})", expanded=False):
+            for cid, entry in archived.items():
+                cols = st.columns([4, 1])
+                with cols[0]:
+                    if st.button(entry["title"][:30], key=f"restore_{cid}", use_container_width=True):
+                        try:
+                            restored = chat_archive.rehydrate_chat(cid)
+                            if restored is None:
+                                st.error("Archived chat could not be found")
+                        except (OSError, EOFError, ValueError) as e:
+                            restored = None
+                            st.error(f"Error opening archived chat: {str(e)}")
+                        if restored is not None:
+                            st.session_state.chats[cid] = restored
+                            # Only forget the archived copy once the hot store is on disk
+                            if save_chats(st.session_state.chats):
+                                try:
+                                    chat_archive.delete_archived_chat(cid)
+                                except (OSError, ValueError) as e:
+                                    st.error(f"Error updating chat archive: {str(e)}")
+                                st.session_state.active_chat = cid
+                                st.rerun()
+                            else:
+                                del st.session_state.chats[cid]
+                with cols[1]:
+                    if st.button("🗑", key=f"del_archived_{cid}"):
+                        try:
+                            chat_archive.delete_archived_chat(cid)
+                            st.rerun()
+                        except (OSError, ValueError) as e:
+                            st.error(f"Error deleting archived chat: {str(e)}")
+
 # ----------------------------
 # Main Chat Area
 # ----------------------------
@@ -481,6 +514,8 @@ else:
                 st.image(img_bytes, width=300, caption="📷 Uploaded Image")
             except Exception as e:
                 st.error(f"Error displaying image: {str(e)}")
+        elif msg.get("image_dropped"):
+            st.caption("🖼 Image removed by retention policy")
         
         # Show OCR result if present
         if msg.get("ocr_text"):
@@ -534,6 +569,7 @@ if st.session_state.show_upload_modal and st.session_state.active_chat:
                                 "image_data": img_base64,
                                 "ocr_text": ocr_text
                             })
+                            chat_archive.touch_chat(chat)
                             save_chats(st.session_state.chats)
                             st.session_state.show_upload_modal = False
                             st.success("✅ Text extracted successfully!")
@@ -570,6 +606,7 @@ if st.session_state.show_upload_modal and st.session_state.active_chat:
                                 "role": "assistant",
                                 "content": response_text
                             })
+                            chat_archive.touch_chat(chat)
                             save_chats(st.session_state.chats)
                             st.session_state.show_upload_modal = False
                             st.rerun()
@@ -587,6 +624,7 @@ if st.session_state.show_upload_modal and st.session_state.active_chat:
                         "image_data": img_base64,
                         "ocr_text": ocr_text if not ocr_text.startswith("ERROR") else None
                     })
+                    chat_archive.touch_chat(chat)
                     save_chats(st.session_state.chats)
                     st.session_state.show_upload_modal = False
                     st.success("✅ Image saved!")
@@ -622,6 +660,7 @@ if st.session_state.active_chat:
             if chat["title"] == "New Chat":
                 chat["title"] = user_input[:30] + ("..." if len(user_input) > 30 else "")
             
+            chat_archive.touch_chat(chat)
             save_chats(st.session_state.chats)
             
             with st.spinner("Thinking..."):
@@ -0,0 +1,298 @@
+"""
+Compressed archival tier for chats.json.
+
+Chats idle longer than ARCHIVE_AFTER_DAYS are moved out of the hot store into
+gzip-compressed JSONL segment files under ARCHIVE_DIR, with a small JSON index
+(id -> title, last activity, segment) so the sidebar can list them without
+decompressing anything. Opening an archived chat rehydrates it into the hot
+store. Retention drops image blobs after DROP_IMAGES_AFTER_DAYS and whole chats
+after DELETE_AFTER_DAYS (0 disables either policy).
+"""
+import datetime
+import gzip
+import json
+import os
+import threading
+import uuid
+
+
+def _env_days(name, default):
+    """Non-negative day count from the environment, falling back to default on bad values"""
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+ARCHIVE_DIR = os.getenv("CHAT_ARCHIVE_DIR", "chat_archive")
+ARCHIVE_AFTER_DAYS = _env_days("CHAT_ARCHIVE_AFTER_DAYS", 30)
+DROP_IMAGES_AFTER_DAYS = _env_days("CHAT_DROP_IMAGES_AFTER_DAYS", 90)
+DELETE_AFTER_DAYS = _env_days("CHAT_DELETE_AFTER_DAYS", 0)
+RETENTION_INTERVAL = datetime.timedelta(hours=24)
+
+INDEX_NAME = "index.json"
+
+# Streamlit runs every browser session as a thread of one process
+_lock = threading.RLock()
+
+
+# ----------------------------
+# Timestamps
+# ----------------------------
+def _parse_ts(value):
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace("T", " "))
+    except ValueError:
+        return None
+
+
+def chat_last_active(chat):
+    """Latest known activity time of a chat, or None if it has no timestamps"""
+    for key in ("updated", "updated_at", "created", "created_at"):
+        ts = _parse_ts(chat.get(key))
+        if ts:
+            return ts
+    return None
+
+
+def touch_chat(chat):
+    """Mark a chat as active now so it stays in the hot store"""
+    chat["updated"] = str(datetime.datetime.now())
+
+
+# ----------------------------
+# Index and segment I/O
+# ----------------------------
+def _index_path(archive_dir):
+    return os.path.join(archive_dir, INDEX_NAME)
+
+
+def load_index(archive_dir=None):
+    """
+    Read the archive index. A corrupt or unreadable index raises (ValueError /
+    OSError) instead of being treated as empty, so it is never overwritten and
+    the segments it points to stay recoverable.
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    path = _index_path(archive_dir)
+    if not os.path.exists(path):
+        return {"chats": {}, "segments": {}, "last_retention": None}
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if not isinstance(index, dict):
+        raise ValueError(f"Archive index {path} is not a JSON object")
+    index.setdefault("chats", {})
+    index.setdefault("segments", {})
+    return index
+
+
+def save_index(index, archive_dir=None):
+    archive_dir = archive_dir or ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+    path = _index_path(archive_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _write_segment(archive_dir, name, entries):
+    """Write (cid, chat) pairs as gzip JSONL, atomically"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, name)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for cid, chat in entries:
+            f.write(json.dumps({"id": cid, "chat": chat}, ensure_ascii=False, default=str))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _read_segment(archive_dir, name):
+    """Yield (cid, chat) pairs from a segment"""
+    path = os.path.join(archive_dir, name)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["id"], record["chat"]
+
+
+def _mark_dead(index, cid):
+    entry = index["chats"].pop(cid, None)
+    if entry:
+        seg = index["segments"].setdefault(entry["segment"], {"dead": 0})
+        seg["dead"] += 1
+    return entry
+
+
+# ----------------------------
+# Public API
+# ----------------------------
+def list_archived(archive_dir=None, exclude=()):
+    """
+    Index entries of archived chats, most recently active first. Ids in
+    `exclude` (e.g. chats a session still holds in its hot store) are hidden.
+    """
+    with _lock:
+        chats = load_index(archive_dir)["chats"]
+    visible = [(cid, entry) for cid, entry in chats.items() if cid not in exclude]
+    return dict(sorted(visible, key=lambda kv: kv[1].get("last_active") or "", reverse=True))
+
+
+def archive_idle_chats(chats, archive_dir=None, after_days=None, now=None, keep=()):
+    """
+    Move chats idle for more than after_days out of `chats` (mutated in place)
+    into a new segment. Chats in `keep` (e.g. the open chat) are never moved.
+    Returns the list of archived chat ids.
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    after_days = ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    if after_days <= 0:
+        return []
+    now = now or datetime.datetime.now()
+    cutoff = now - datetime.timedelta(days=after_days)
+
+    idle = []
+    for cid, chat in chats.items():
+        last_active = chat_last_active(chat)
+        if cid not in keep and last_active and last_active < cutoff:
+            idle.append((cid, chat, last_active))
+    if not idle:
+        return []
+
+    with _lock:
+        index = load_index(archive_dir)
+        # A session opened before an earlier archive run may have re-saved an
+        # archived chat. If the archive already holds a copy at least as recent,
+        # the hot copy is stale: drop it without writing a new entry.
+        fresh = []
+        for cid, chat, last_active in idle:
+            existing = index["chats"].get(cid)
+            archived_at = _parse_ts(existing.get("last_active")) if existing else None
+            if not archived_at or last_active > archived_at:
+                fresh.append((cid, chat, last_active))
+
+        if fresh:
+            name = f"segment-{now:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.jsonl.gz"
+            _write_segment(archive_dir, name, [(cid, chat) for cid, chat, _ in fresh])
+            index["segments"][name] = {"dead": 0}
+            for cid, chat, last_active in fresh:
+                _mark_dead(index, cid)
+                index["chats"][cid] = {
+                    "title": chat.get("title", "Untitled"),
+                    "created": chat.get("created") or chat.get("created_at"),
+                    "last_active": str(last_active),
+                    "segment": name,
+                    "images_dropped": False,
+                }
+            save_index(index, archive_dir)
+
+    for cid, _, _ in idle:
+        del chats[cid]
+    return [cid for cid, _, _ in idle]
+
+
+def rehydrate_chat(cid, archive_dir=None):
+    """
+    Read an archived chat back out of its segment, marked as active now.
+    The archive is left untouched: call delete_archived_chat only once the
+    chat has been written to the hot store. Returns None if the chat is not
+    archived or its record is missing; a missing or truncated segment raises
+    OSError/EOFError.
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    with _lock:
+        entry = load_index(archive_dir)["chats"].get(cid)
+        if not entry:
+            return None
+        chat = None
+        for seg_cid, seg_chat in _read_segment(archive_dir, entry["segment"]):
+            if seg_cid == cid:
+                chat = seg_chat
+                break
+    if chat is not None:
+        touch_chat(chat)
+    return chat
+
+
+def delete_archived_chat(cid, archive_dir=None):
+    """Drop a chat from the index; its segment record is reclaimed by retention"""
+    with _lock:
+        index = load_index(archive_dir)
+        if _mark_dead(index, cid):
+            save_index(index, archive_dir)
+
+
+def apply_retention(archive_dir=None, drop_images_days=None, delete_days=None, now=None, force=False):
+    """
+    Enforce retention on the archive: drop image blobs from chats idle past
+    drop_images_days, delete chats idle past delete_days, and rewrite only
+    the segments that changed (or hold dead entries). Runs at most once per
+    RETENTION_INTERVAL unless force is set, and never creates an archive
+    that doesn't exist yet. Returns a summary dict.
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    drop_images_days = DROP_IMAGES_AFTER_DAYS if drop_images_days is None else drop_images_days
+    delete_days = DELETE_AFTER_DAYS if delete_days is None else delete_days
+    now = now or datetime.datetime.now()
+    summary = {"deleted": 0, "images_dropped": 0, "segments_rewritten": 0, "segments_removed": 0}
+
+    with _lock:
+        if not os.path.exists(_index_path(archive_dir)):
+            return summary
+        index = load_index(archive_dir)
+        last_run = _parse_ts(index.get("last_retention"))
+        if not force and last_run and now - last_run < RETENTION_INTERVAL:
+            return summary
+
+        drop_cutoff = now - datetime.timedelta(days=drop_images_days) if drop_images_days > 0 else None
+        delete_cutoff = now - datetime.timedelta(days=delete_days) if delete_days > 0 else None
+
+        to_drop_images = set()
+        for cid, entry in list(index["chats"].items()):
+            last_active = _parse_ts(entry.get("last_active"))
+            if not last_active:
+                continue
+            if delete_cutoff and last_active < delete_cutoff:
+                _mark_dead(index, cid)
+                summary["deleted"] += 1
+            elif drop_cutoff and last_active < drop_cutoff and not entry.get("images_dropped"):
+                to_drop_images.add(cid)
+
+        live_by_segment = {}
+        for cid, entry in index["chats"].items():
+            live_by_segment.setdefault(entry["segment"], set()).add(cid)
+
+        for name, seg in list(index["segments"].items()):
+            live = live_by_segment.get(name, set())
+            if not live:
+                path = os.path.join(archive_dir, name)
+                if os.path.exists(path):
+                    os.remove(path)
+                del index["segments"][name]
+                summary["segments_removed"] += 1
+                continue
+            if not seg.get("dead") and not (live & to_drop_images):
+                continue
+
+            kept = []
+            for cid, chat in _read_segment(archive_dir, name):
+                if cid not in live:
+                    continue
+                if cid in to_drop_images:
+                    for msg in chat.get("messages", []):
+                        if msg.pop("image_data", None) is not None:
+                            msg["image_dropped"] = True
+                    index["chats"][cid]["images_dropped"] = True
+                    summary["images_dropped"] += 1
+                kept.append((cid, chat))
+            _write_segment(archive_dir, name, kept)
+            seg["dead"] = 0
+            summary["segments_rewritten"] += 1
+
+        index["last_retention"] = str(now)
+        save_index(index, archive_dir)
+    return summary
@@ -0,0 +1,338 @@
+"""
+Concurrent-session load test for app.py.
+
+Drives N simulated Streamlit sessions (chatting, uploading images, switching
+chats) with Groq calls sent to mock_groq_server.py, and reports throughput,
+chat and upload latency percentiles and memory per session for each N:
+
+    python loadtest.py --sessions 1,5,10,25 --turns 20 --latency-ms 300
+    python loadtest.py --base-url http://127.0.0.1:8765/openai/v1   # external mock
+
+Each session runs in its own process with its own AppTest, because AppTest
+swaps process-global Streamlit state on every run and can't be run from
+several threads at once. Sessions therefore overlap for real — including
+while blocked on the Groq round trip — and share only the chats file, the
+archive directory and the mock server, as sessions of one deployment do.
+Every worker warms up (imports, one untimed script run, one OCR call) before
+a barrier releases them all, so the timed pass excludes start-up cost.
+
+Memory per session is measured in a second pass, with tracemalloc started in
+each worker after warm-up, so the timed pass runs uninstrumented.
+
+AppTest cannot feed st.file_uploader, so an "upload" runs the same helpers
+the 💾 Save button does (ocr_helpers.extract_text_from_image and
+image_to_base64 on a generated screenshot), appends the same message and
+reruns the script. The chats file is written by the app's own save_chats on
+the next chat turn. Upload latency is reported separately from chat latency.
+"""
+import argparse
+import gc
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from PIL import Image, ImageDraw
+
+import chat_archive
+from mock_groq_server import add_config_args, config_from_args, start_server
+from ocr_helpers import extract_text_from_image, image_to_base64
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+PROMPTS = [
+    "What does the text in the image say?",
+    "Summarize the screenshot in one sentence.",
+    "Are there any dates mentioned?",
+    "Translate the extracted text to French.",
+    "List the key points as bullets.",
+]
+
+
+def make_screenshot(width, height):
+    """White image with lines of text, so OCR does realistic work"""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    rng = random.Random(width * height)
+    words = ["invoice", "total", "meeting", "2025-09-23", "error", "report", "status", "user", "42.50"]
+    for y in range(10, height - 20, 24):
+        draw.text((10, y), " ".join(rng.choice(words) for _ in range(10)), fill="black")
+    return image
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class SessionResult:
+    def __init__(self):
+        self.chat_latencies = []
+        self.upload_latencies = []
+        self.actions = {"chat": 0, "upload": 0, "switch": 0}
+        self.api_errors = 0
+        self.ocr_errors = 0
+        self.exceptions = []
+        self.mem_kib = None
+        self.peak_kib = None
+
+
+def find_button(at, label):
+    for button in at.button:
+        if button.label == label:
+            return button
+    return None
+
+
+def new_app(args):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    # app.py reads the key from st.secrets; the mock ignores its value
+    at.secrets["GROQ_API_KEY"] = "mock-key"
+    return at
+
+
+def upload(at, image, result):
+    """What the 💾 Save button does, minus the st.file_uploader widget"""
+    start = time.perf_counter()
+    ocr_text = extract_text_from_image(image, "eng")
+    img_base64 = image_to_base64(image)
+    if ocr_text.startswith("ERROR"):
+        result.ocr_errors += 1
+    chat = at.session_state["chats"][at.session_state["active_chat"]]
+    chat["messages"].append({
+        "role": "user",
+        "content": "💾 Image saved",
+        "image_data": img_base64,
+        "ocr_text": ocr_text if not ocr_text.startswith("ERROR") else None,
+    })
+    chat_archive.touch_chat(chat)
+    at.run()
+    result.upload_latencies.append(time.perf_counter() - start)
+
+
+def run_session(session_id, args, image, result):
+    """Simulate one browser session; returns the AppTest so its memory stays live"""
+    rng = random.Random(args.seed + session_id)
+    at = new_app(args)
+    at.run()
+    find_button(at, "➕ New Chat").click().run()
+
+    weights = [args.chat_weight, args.upload_weight, args.switch_weight]
+    for _ in range(args.turns):
+        action = rng.choices(["chat", "upload", "switch"], weights=weights)[0]
+
+        if action == "upload":
+            upload(at, image, result)
+        elif action == "switch":
+            open_buttons = [b for b in at.button if b.key and b.key.startswith("open_")]
+            if len(open_buttons) < 2 or rng.random() < 0.3:
+                find_button(at, "➕ New Chat").click().run()
+            else:
+                rng.choice(open_buttons).click().run()
+        else:
+            start = time.perf_counter()
+            at.chat_input[0].set_value(rng.choice(PROMPTS)).run()
+            result.chat_latencies.append(time.perf_counter() - start)
+
+            chat = at.session_state["chats"][at.session_state["active_chat"]]
+            if chat["messages"] and chat["messages"][-1]["content"].startswith("⚠️"):
+                result.api_errors += 1
+
+        result.actions[action] += 1
+        if at.exception:
+            result.exceptions.extend(e.message for e in at.exception)
+        if args.think_time_ms:
+            time.sleep(rng.uniform(0, args.think_time_ms) / 1000.0)
+    return at
+
+
+def session_worker(session_id, args, data_file, measure_memory, barrier, queue):
+    """Process entry point: warm up, wait for the others, run one session"""
+    result = SessionResult()
+    image = None
+    try:
+        # Keep archiving/retention run by each session start away from the real archive
+        chat_archive.ARCHIVE_DIR = args.archive_dir
+        image = make_screenshot(args.width, args.height)
+        os.environ["CHAT_DATA_FILE"] = os.path.join(args.work_dir, f"warmup_{os.getpid()}.json")
+        new_app(args).run()
+        extract_text_from_image(image, "eng")
+        os.environ["CHAT_DATA_FILE"] = data_file
+    except Exception as e:
+        result.exceptions.append(f"warm-up {type(e).__name__}: {e}")
+
+    barrier.wait()
+    if result.exceptions:
+        queue.put(result)
+        return
+
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+    try:
+        at = run_session(session_id, args, image, result)
+        if measure_memory:
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+            result.mem_kib = current / 1024
+            result.peak_kib = peak / 1024
+            del at
+    except Exception as e:
+        result.exceptions.append(f"{type(e).__name__}: {e}")
+    queue.put(result)
+
+
+def run_sessions(n_sessions, args, label, measure_memory=False):
+    """Run n_sessions worker processes against a fresh chats file"""
+    data_file = os.path.join(args.work_dir, f"chats_{n_sessions}_{label}.json")
+    if os.path.exists(data_file):
+        os.remove(data_file)
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_sessions + 1)
+    queue = ctx.Queue()
+    workers = [
+        ctx.Process(target=session_worker, args=(i, args, data_file, measure_memory, barrier, queue))
+        for i in range(n_sessions)
+    ]
+    for w in workers:
+        w.start()
+
+    barrier.wait(timeout=args.warmup_timeout)
+    start = time.perf_counter()
+    # Drain the queue before joining so workers never block on a full pipe
+    results = [queue.get() for _ in workers]
+    wall = time.perf_counter() - start
+    for w in workers:
+        w.join()
+    return results, wall, data_file
+
+
+def run_level(n_sessions, args):
+    """Timed, uninstrumented run of n_sessions; memory columns are filled in later"""
+    results, wall, data_file = run_sessions(n_sessions, args, "timing")
+
+    latencies = [lat for r in results for lat in r.chat_latencies]
+    uploads = [lat for r in results for lat in r.upload_latencies]
+    actions = sum(sum(r.actions.values()) for r in results)
+
+    return {
+        "sessions": n_sessions,
+        "actions": actions,
+        "chat_turns": len(latencies),
+        "wall_s": wall,
+        "actions_per_s": actions / wall if wall else 0.0,
+        "chat_turns_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "upload_p50_ms": percentile(uploads, 50) * 1000,
+        "upload_p95_ms": percentile(uploads, 95) * 1000,
+        "api_errors": sum(r.api_errors for r in results),
+        "ocr_errors": sum(r.ocr_errors for r in results),
+        "exceptions": [e for r in results for e in r.exceptions],
+        "mem_per_session_kib": None,
+        "peak_per_session_kib": None,
+        "chats_file_kib": os.path.getsize(data_file) / 1024 if os.path.exists(data_file) else 0.0,
+    }
+
+
+def measure_memory(n_sessions, args):
+    """Mean traced bytes retained and peak per session, from a separate pass"""
+    results, _, _ = run_sessions(n_sessions, args, "memory", measure_memory=True)
+    measured = [r for r in results if r.mem_kib is not None]
+    if not measured:
+        return {}
+    return {
+        "mem_per_session_kib": sum(r.mem_kib for r in measured) / len(measured),
+        "peak_per_session_kib": sum(r.peak_kib for r in measured) / len(measured),
+    }
+
+
+def print_report(summaries):
+    header = (
+        f"{'N':>4} {'actions':>8} {'turns':>6} {'wall s':>8} {'act/s':>7} {'turn/s':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'up p50':>8} {'up p95':>8} {'api err':>7} "
+        f"{'KiB/sess':>9} {'peak KiB':>9} {'file KiB':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for s in summaries:
+        mem = "-" if s["mem_per_session_kib"] is None else f"{s['mem_per_session_kib']:.1f}"
+        peak = "-" if s["peak_per_session_kib"] is None else f"{s['peak_per_session_kib']:.1f}"
+        print(
+            f"{s['sessions']:>4} {s['actions']:>8} {s['chat_turns']:>6} {s['wall_s']:>8.2f} "
+            f"{s['actions_per_s']:>7.2f} {s['chat_turns_per_s']:>7.2f} "
+            f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+            f"{s['upload_p50_ms']:>8.1f} {s['upload_p95_ms']:>8.1f} {s['api_errors']:>7} "
+            f"{mem:>9} {peak:>9} {s['chats_file_kib']:>9.1f}"
+        )
+    for s in summaries:
+        if s["ocr_errors"]:
+            print(f"\nN={s['sessions']}: {s['ocr_errors']} OCR error(s) — is Tesseract installed? Upload latency excludes OCR.")
+        if s["exceptions"]:
+            print(f"\nN={s['sessions']}: {len(s['exceptions'])} exception(s), first: {s['exceptions'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the chat app")
+    parser.add_argument("--sessions", default="1,5,10", help="Comma-separated session counts to run")
+    parser.add_argument("--turns", type=int, default=10, help="Actions per session")
+    parser.add_argument("--chat-weight", type=float, default=0.7)
+    parser.add_argument("--upload-weight", type=float, default=0.15)
+    parser.add_argument("--switch-weight", type=float, default=0.15)
+    parser.add_argument("--image-size", default="800x600", help="Simulated screenshot size, WIDTHxHEIGHT")
+    parser.add_argument("--think-time-ms", type=float, default=0, help="Max random pause between actions")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-rerun AppTest timeout in seconds")
+    parser.add_argument("--warmup-timeout", type=float, default=300, help="Max seconds for workers to warm up")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", default=None, help="Use an already running mock instead of starting one")
+    parser.add_argument("--work-dir", default=None, help="Where per-run chats files and archive go (default: temp dir)")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc memory pass")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    args.width, args.height = (int(v) for v in args.image_size.lower().split("x"))
+    args.work_dir = args.work_dir or tempfile.mkdtemp(prefix="chat_load_")
+    args.archive_dir = os.path.join(args.work_dir, "chat_archive")
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server, base_url = start_server(config=config_from_args(args))
+    # Inherited by the workers; read by app.py at the top of every script run
+    os.environ["GROQ_BASE_URL"] = base_url
+
+    print(f"App: {APP_PATH}")
+    print(f"Mock Groq: {base_url}")
+    print(f"Chats files and archive: {args.work_dir}")
+    print(f"Levels: {levels}, {args.turns} actions/session, one process per session\n")
+
+    try:
+        summaries = [run_level(n, args) for n in levels]
+        if not args.skip_memory:
+            for summary in summaries:
+                summary.update(measure_memory(summary["sessions"], args))
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    print_report(summaries)
+    if server:
+        print(f"\nMock stats: {server.RequestHandlerClass.config.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Local OpenAI-compatible mock of the Groq chat completions API.
+
+Run it and point the app at it:
+
+    python mock_groq_server.py --port 8765 --latency-ms 400 --rate-limit-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8765/openai/v1 streamlit run app.py
+
+app.py refuses to call the API without GROQ_API_KEY in st.secrets, so put a
+dummy key (GROQ_API_KEY = "mock") in .streamlit/secrets.toml; the mock ignores
+auth.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+
+class MockConfig:
+    """Knobs controlling how the mock responds"""
+
+    def __init__(self, latency_ms=300, jitter_ms=100, error_rate=0.0,
+                 rate_limit_rate=0.0, stream_chunk_delay_ms=20, reply_words=40):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stream_chunk_delay_ms = stream_chunk_delay_ms
+        self.reply_words = reply_words
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def delay(self):
+        """Sleep for the configured latency plus uniform jitter"""
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000.0)
+
+
+def build_reply(messages, words):
+    """Deterministic-looking filler reply that echoes the last user message"""
+    last = ""
+    for m in reversed(messages):
+        if isinstance(m, dict) and m.get("role") == "user":
+            last = str(m.get("content", ""))
+            break
+    filler = " ".join(f"token{i}" for i in range(words))
+    return f"(Mock reply) You said: {last[:200]}\n\n{filler}"
+
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    config = MockConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep load-test output readable
+        pass
+
+    def _send_json(self, status, payload, extra_headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.config.lock:
+                self._send_json(200, dict(self.config.stats))
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if self.path not in COMPLETION_PATHS:
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("messages"), list):
+            self._send_json(400, {"error": {"message": "'messages' must be a list", "type": "invalid_request_error"}})
+            return
+
+        cfg = self.config
+        cfg.count("requests")
+        cfg.delay()
+
+        roll = random.random()
+        if roll < cfg.rate_limit_rate:
+            cfg.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                {"Retry-After": "1"},
+            )
+            return
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            cfg.count("errors")
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        model = data.get("model", "llama-3.1-8b-instant")
+        reply = build_reply(data.get("messages", []), cfg.reply_words)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if data.get("stream"):
+            self._stream(completion_id, created, model, reply)
+        else:
+            prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in data["messages"] if isinstance(m, dict))
+            completion_tokens = len(reply.split())
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+        cfg.count("ok")
+
+    def _stream(self, completion_id, created, model, reply):
+        """Send the reply as server-sent events, one word per chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        emit({"role": "assistant"})
+        for word in reply.split(" "):
+            emit({"content": word + " "})
+            time.sleep(self.config.stream_chunk_delay_ms / 1000.0)
+        emit({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(host="127.0.0.1", port=0, config=None):
+    """Build a threaded HTTP server whose handler uses the given config"""
+    handler = type("ConfiguredMockGroqHandler", (MockGroqHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(host="127.0.0.1", port=0, config=None):
+    """Start the mock in a background thread; returns (server, base_url)"""
+    server = make_server(host, port, config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}/openai/v1"
+    return server, base_url
+
+
+def add_config_args(parser):
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Uniform +/- jitter on latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=20, help="Delay between streamed chunks")
+    parser.add_argument("--reply-words", type=int, default=40, help="Filler words appended to each reply")
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        stream_chunk_delay_ms=args.stream_chunk_delay_ms,
+        reply_words=args.reply_words,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Groq (OpenAI-compatible) chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, config_from_args(args))
+    print(f"Mock Groq server listening on http://{args.host}:{args.port}/openai/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""OCR and image helpers shared by app.py and the load-test harness"""
+import base64
+import io
+
+import pytesseract
+
+
+def extract_text_from_image(image, lang='eng'):
+    """Extract text from PIL Image using Tesseract OCR"""
+    try:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        custom_config = r'--oem 3 --psm 6'
+        text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
+        return text.strip()
+    except pytesseract.TesseractNotFoundError:
+        return "ERROR: Tesseract is not installed. Please check your packages.txt file."
+    except Exception as e:
+        return f"Error extracting text: {str(e)}"
+
+
+def image_to_base64(image):
+    """Convert PIL Image to base64 for storage"""
+    buffered = io.BytesIO()
+    image.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
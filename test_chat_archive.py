@@ -0,0 +1,167 @@
+import datetime
+import gzip
+import os
+
+import pytest
+
+import chat_archive
+
+NOW = datetime.datetime(2026, 10, 19, 12, 0, 0)
+
+
+def days_ago(days):
+    return str(NOW - datetime.timedelta(days=days))
+
+
+def make_chat(title, days_idle, image=None):
+    message = {"role": "user", "content": "hi"}
+    if image:
+        message["image_data"] = image
+    return {"title": title, "created": days_ago(days_idle), "messages": [message]}
+
+
+def test_archive_then_rehydrate_round_trip(tmp_path):
+    chats = {"old": make_chat("Old", 40, image="AAAA"), "new": make_chat("New", 1)}
+
+    archived = chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    assert archived == ["old"]
+    assert list(chats) == ["new"]
+    assert list(chat_archive.list_archived(str(tmp_path))) == ["old"]
+
+    restored = chat_archive.rehydrate_chat("old", str(tmp_path))
+    assert restored["title"] == "Old"
+    assert restored["messages"][0]["image_data"] == "AAAA"
+    assert "updated" in restored
+    # Rehydrating only reads; the caller forgets the archived copy once saved
+    assert "old" in chat_archive.list_archived(str(tmp_path))
+    chat_archive.delete_archived_chat("old", str(tmp_path))
+    assert chat_archive.list_archived(str(tmp_path)) == {}
+
+
+def test_keep_prevents_archiving(tmp_path):
+    chats = {"open": make_chat("Open", 40)}
+    assert chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW, keep={"open"}) == []
+    assert list(chats) == ["open"]
+
+
+def test_retention_drops_images(tmp_path):
+    chats = {"a": make_chat("A", 100, image="AAAA")}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    summary = chat_archive.apply_retention(str(tmp_path), drop_images_days=90, delete_days=0, now=NOW)
+
+    assert summary["images_dropped"] == 1
+    assert chat_archive.list_archived(str(tmp_path))["a"]["images_dropped"] is True
+    message = chat_archive.rehydrate_chat("a", str(tmp_path))["messages"][0]
+    assert "image_data" not in message
+    assert message["image_dropped"] is True
+
+
+def test_retention_deletes_whole_segment(tmp_path):
+    chats = {"a": make_chat("A", 400), "b": make_chat("B", 500)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    summary = chat_archive.apply_retention(str(tmp_path), drop_images_days=0, delete_days=365, now=NOW)
+
+    assert summary["deleted"] == 2
+    assert summary["segments_removed"] == 1
+    assert os.listdir(tmp_path) == [chat_archive.INDEX_NAME]
+    assert chat_archive.list_archived(str(tmp_path)) == {}
+
+
+def test_retention_throttled_to_once_per_interval(tmp_path):
+    chats = {"a": make_chat("A", 400)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+    chat_archive.apply_retention(str(tmp_path), drop_images_days=0, delete_days=0, now=NOW)
+
+    later = NOW + datetime.timedelta(hours=1)
+    skipped = chat_archive.apply_retention(str(tmp_path), drop_images_days=0, delete_days=365, now=later)
+    assert skipped["deleted"] == 0
+    assert "a" in chat_archive.list_archived(str(tmp_path))
+
+    next_day = NOW + datetime.timedelta(hours=25)
+    ran = chat_archive.apply_retention(str(tmp_path), drop_images_days=0, delete_days=365, now=next_day)
+    assert ran["deleted"] == 1
+
+
+def test_retention_without_archive_creates_nothing(tmp_path):
+    archive_dir = tmp_path / "chat_archive"
+    chat_archive.apply_retention(str(archive_dir), now=NOW, force=True)
+    assert not archive_dir.exists()
+
+
+def test_legacy_timestamps():
+    legacy = {"title": "Hlo", "created_at": "2025-09-23T15:01:29.273945", "updated_at": "2025-09-24T10:00:00"}
+    assert chat_archive.chat_last_active(legacy) == datetime.datetime(2025, 9, 24, 10, 0, 0)
+
+    created_only = {"title": "Hlo", "created_at": "2025-09-23T15:01:29.273945"}
+    assert chat_archive.chat_last_active(created_only) == datetime.datetime(2025, 9, 23, 15, 1, 29, 273945)
+
+
+def test_legacy_chat_is_archived(tmp_path):
+    chats = {"legacy": {"title": "Hlo", "created_at": "2025-09-23T15:01:29.273945", "messages": []}}
+    assert chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW) == ["legacy"]
+    assert chat_archive.list_archived(str(tmp_path))["legacy"]["created"] == "2025-09-23T15:01:29.273945"
+
+
+def test_rehydrate_missing_record_keeps_index(tmp_path):
+    chats = {"a": make_chat("A", 40)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+    segment = chat_archive.list_archived(str(tmp_path))["a"]["segment"]
+    with gzip.open(tmp_path / segment, "wt", encoding="utf-8"):
+        pass
+
+    assert chat_archive.rehydrate_chat("a", str(tmp_path)) is None
+    assert "a" in chat_archive.list_archived(str(tmp_path))
+
+
+def test_list_archived_hides_hot_chats(tmp_path):
+    chats = {"a": make_chat("A", 40), "b": make_chat("B", 50)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    assert list(chat_archive.list_archived(str(tmp_path), exclude={"a": {}})) == ["b"]
+
+
+def test_stale_hot_copy_is_not_archived_again(tmp_path):
+    stale = make_chat("A", 40)
+    chats = {"a": dict(stale)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+    segment = chat_archive.list_archived(str(tmp_path))["a"]["segment"]
+
+    # An older session re-saves its copy of the same chat
+    chats = {"a": dict(stale)}
+    assert chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW) == ["a"]
+    assert chats == {}
+    assert chat_archive.list_archived(str(tmp_path))["a"]["segment"] == segment
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".jsonl.gz")]) == 1
+
+
+def test_newer_hot_copy_replaces_archived_one(tmp_path):
+    chats = {"a": make_chat("A", 60)}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    newer = make_chat("A", 40)
+    newer["messages"].append({"role": "assistant", "content": "later"})
+    chats = {"a": newer}
+    chat_archive.archive_idle_chats(chats, str(tmp_path), after_days=30, now=NOW)
+
+    assert chat_archive.rehydrate_chat("a", str(tmp_path))["messages"][-1]["content"] == "later"
+
+
+def test_corrupt_index_raises_and_is_kept(tmp_path):
+    index_path = tmp_path / chat_archive.INDEX_NAME
+    index_path.write_text("{not json", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        chat_archive.list_archived(str(tmp_path))
+    with pytest.raises(ValueError):
+        chat_archive.archive_idle_chats({"a": make_chat("A", 40)}, str(tmp_path), after_days=30, now=NOW)
+    assert index_path.read_text(encoding="utf-8") == "{not json"
+
+
+def test_env_days_falls_back_on_bad_values(monkeypatch):
+    monkeypatch.setenv("CHAT_ARCHIVE_AFTER_DAYS", "30d")
+    assert chat_archive._env_days("CHAT_ARCHIVE_AFTER_DAYS", 30) == 30
+    monkeypatch.setenv("CHAT_ARCHIVE_AFTER_DAYS", "7")
+    assert chat_archive._env_days("CHAT_ARCHIVE_AFTER_DAYS", 30) == 7
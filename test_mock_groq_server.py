@@ -0,0 +1,86 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from mock_groq_server import MockConfig, start_server
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def _serve(**kwargs):
+        server, base_url = start_server(config=MockConfig(latency_ms=0, jitter_ms=0, stream_chunk_delay_ms=0, **kwargs))
+        servers.append(server)
+        return server, base_url
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(base_url, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(
+        f"{base_url}/chat/completions", data=data, headers={"Content-Type": "application/json"}
+    )
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_completion(serve):
+    server, base_url = serve(reply_words=3)
+    response = post(base_url, {"model": "m", "messages": [{"role": "user", "content": "hello there"}]})
+
+    payload = json.loads(response.read())
+    assert response.status == 200
+    assert payload["model"] == "m"
+    assert payload["choices"][0]["message"]["content"].startswith("(Mock reply) You said: hello there")
+    assert payload["usage"]["total_tokens"] == payload["usage"]["prompt_tokens"] + payload["usage"]["completion_tokens"]
+    assert server.RequestHandlerClass.config.stats["ok"] == 1
+
+
+def test_streaming_ends_with_done(serve):
+    _, base_url = serve(reply_words=3)
+    response = post(base_url, {"messages": [{"role": "user", "content": "hi"}], "stream": True})
+
+    events = [line[len("data: "):] for line in response.read().decode("utf-8").splitlines() if line.startswith("data: ")]
+    assert response.headers["Content-Type"] == "text/event-stream"
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(e) for e in events[:-1]]
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant"}
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    text = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+    assert "You said: hi" in text
+
+
+def test_rate_limit_injection(serve):
+    server, base_url = serve(rate_limit_rate=1.0)
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        post(base_url, {"messages": []})
+
+    assert exc.value.code == 429
+    assert exc.value.headers["Retry-After"] == "1"
+    assert server.RequestHandlerClass.config.stats["rate_limited"] == 1
+
+
+def test_error_injection(serve):
+    server, base_url = serve(error_rate=1.0)
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        post(base_url, {"messages": []})
+
+    assert exc.value.code == 500
+    assert json.loads(exc.value.read())["error"]["type"] == "server_error"
+    assert server.RequestHandlerClass.config.stats["errors"] == 1
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[1]", b"{}", b'{"messages": "hi"}'])
+def test_bad_requests(serve, body):
+    server, base_url = serve()
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        post(base_url, body)
+
+    assert exc.value.code == 400
+    assert server.RequestHandlerClass.config.stats["requests"] == 0